@@ -0,0 +1,40 @@
+#This py file converts the csv data into parquet files which are much quicker for the streamlit app to load
+#it only needs to be run again if the csv data changes
+
+#importing packages
+import pandas as pd
+
+# Narrower dtypes for the columns, the data only has a few significant figures so float32 loses nothing meaningful
+# t is kept as float64 so the year values shown in the select boxes stay exact (e.g. 0.019 rather than 0.0189999)
+# R is kept as a float rather than a category as the app does arithmetic with it
+dtypes = {'R': 'float32', 'Zmean': 'float32', 'vZ_mean': 'float32',
+          'A_height': 'float32', 'C_height': 'float32', 'D_height': 'float32',
+          'A_velocity': 'float32', 'C_velocity': 'float32', 'D_velocity': 'float32'}
+# Integer columns are downcast to the smallest integer type that holds their values (phi and N both fit in int16)
+integer_columns = ['phi', 'N']
+
+# Function to apply the narrower dtypes to a DataFrame
+def downcast(df):
+    """
+    Converts the float columns to float32 and the integer columns to the smallest integer type that fits their values.
+    Parameters:
+    df = pandas.DataFrame: The DataFrame to convert, only the columns it contains are converted.
+    Returns = pandas.DataFrame: The DataFrame with the narrower dtypes.
+    """
+    df = df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+    for col in integer_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+# The CSVs are read with the multithreaded pyarrow parser, which also parses the floats with correct rounding
+# Convert the raw simulation data, storing phi in degrees so the app doesn't have to scale it when loading
+full_df = pd.read_csv('all_data.tab', engine='pyarrow')
+full_df['phi'] = full_df['phi'] * 10
+full_df = downcast(full_df)
+full_df.to_parquet('all_data.parquet', engine='pyarrow', index=False)
+
+# Convert the simulation data with the fitted sine parameters
+two_df = pd.read_csv('total_data_df.csv', engine='pyarrow')
+two_df = downcast(two_df)
+two_df.to_parquet('total_data_df.parquet', engine='pyarrow', index=False)
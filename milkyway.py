@@ -4,14 +4,13 @@
 import matplotlib.pyplot as plt
 import pandas as pd
 from matplotlib.patches import Ellipse
+from matplotlib.figure import Figure
 import streamlit as st
 import numpy as np
-import seaborn as sns
-from matplotlib.colors import Normalize
 from PIL import Image
 import os
+from functools import lru_cache
 import plotly.graph_objs as go
-from plotly.subplots import make_subplots
 
 # Load the external CSS file
 with open('styles.css') as f:
@@ -22,11 +21,75 @@ with open('styles.css') as f:
 galaxy_emoji = "🌌"
 star_emoji = "✨"
 st.title(f"{galaxy_emoji}Understanding the Milky Way's Warp!{galaxy_emoji}")
-full_df = pd.read_csv('all_data.tab')
-full_df['phi'] = full_df['phi'] * 10
-two_df = pd.read_csv('total_data_df.csv')
 
-#all of the functions apart from tab6 with docstrings included
+# Functions to load the data (converted to parquet by convert.py), cached so the files are only read once rather than on every rerun
+@st.cache_data
+def load_full():
+    """
+    Loads the raw simulation data, phi is already stored in degrees by convert.py.
+    Returns = pandas.DataFrame: The full dataset with columns t, phi, R, Zmean and vZ_mean.
+    """
+    return pd.read_parquet('all_data.parquet', columns=['t', 'phi', 'R', 'Zmean', 'vZ_mean'], engine='pyarrow')
+
+@st.cache_data
+def load_two():
+    """
+    Loads the simulation data along with the fitted sine parameters for height and velocity.
+    Returns = pandas.DataFrame: The dataset including the A, C and D columns for height and velocity.
+    """
+    columns = ['t', 'phi', 'R', 'Zmean', 'vZ_mean', 'A_height', 'C_height', 'D_height', 'A_velocity', 'C_velocity', 'D_velocity']
+    return pd.read_parquet('total_data_df.parquet', columns=columns, engine='pyarrow')
+
+# Function to split the full dataset up by a column, cached as a resource so the groups aren't copied on every rerun
+@st.cache_resource
+def group_full(column):
+    """
+    Splits the full dataset into the rows for each value of a column so the tabs can look up the rows they need 
+    directly instead of filtering the whole DataFrame each time. The groups are shared between reruns so must not be modified.
+    Parameters:
+    column = str: The name of the column to group by (e.g. 'R' or 't').
+    Returns = dict: A dictionary mapping each value of the column to a DataFrame of its rows.
+    """
+    return dict(tuple(load_full().groupby(column, sort=False)))
+
+# Function to find the values of phi, R and t in the full dataset, cached as they are fixed properties of the data
+@st.cache_data
+def full_unique_values():
+    """
+    Finds the sorted unique values of phi, R and t in the full dataset, used as the options for the select boxes.
+    Returns = dict: A dictionary mapping 'phi', 'R' and 't' to a sorted array of their unique values.
+    """
+    df = load_full()
+    return {col: np.sort(df[col].unique()) for col in ['phi', 'R', 't']}
+
+# Function to find the values of R and t in load_two(), cached so the columns aren't scanned on every rerun
+@st.cache_data
+def two_unique_values():
+    """
+    Finds the sorted unique values of R and t in load_two(), used as the options for the select boxes in the later tabs.
+    Returns = dict: A dictionary mapping 'R' to a tuple of floats and 't' to a sorted array of their unique values.
+    """
+    df = load_two()
+    # The radii are a tuple of plain floats, so the widgets don't have to convert an array into a list on every rerun
+    return {'R': tuple(np.sort(df['R'].unique()).tolist()), 't': np.sort(df['t'].unique())}
+
+full_uniques = full_unique_values()
+# Largest radius in the data, every year contains the same grid of radii so this is found once from the cached sorted values
+R_MAX = float(full_uniques['R'][-1])
+# Above this many points in a year the circular plot is binned with hexbin rather than drawing a circle for every point
+SCATTER_MAX_POINTS = 5000
+# Most markers drawn on a line in the model and phase difference plots, longer lines only mark every few points
+MAX_MARKERS = 500
+# Graphs are saved as lossless WebP, which is around a third of the size of PNG for these plots
+GRAPH_SAVE_OPTIONS = {'format': 'webp', 'bbox_inches': 'tight', 'pil_kwargs': {'lossless': True}}
+# Sorted radius and year values of load_two(), used as the options for the select boxes in the later tabs
+two_uniques = two_unique_values()
+R_VALUES = two_uniques['R']
+T_VALUES = two_uniques['t']
+full_by_phi = group_full('phi')
+full_by_t = group_full('t')
+
+#all of the functions apart from the tab6 plot with docstrings included
 # Function to define the sine function
 def sine_function(phi, A, C, D):
     """
@@ -34,9 +97,11 @@ def sine_function(phi, A, C, D):
     We don't include a frewuency as this would alter the period of the wave and not be consistent with the phi range of 360 degrees.
     Parameters:
     phi = between 0 and 360: The input angle(s) in degrees.
-    A = float: The amplitude of the sine wave.
-    C = float: The phase shift of the sine wave in degrees.
-    D = float: The vertical shift of the sine wave.
+    A = float or ndarray: The amplitude of the sine wave.
+    C = float or ndarray: The phase shift of the sine wave in degrees.
+    D = float or ndarray: The vertical shift of the sine wave.
+    The parameters can be arrays that broadcast against phi, e.g. a column of parameters for each year against a row of 
+    phi values gives a curve for each year.
     Returns = float or ndarray: The computed sine value(s) after applying the amplitude, phase shift, and vertical shift.
     """
     return A * np.sin(np.deg2rad(phi + C)) + D
@@ -52,15 +117,144 @@ def adjust_amplitude_phase(df, amp_col, phase_col):
     phase_col = str: The name of the column in the DataFrame that contains phase shift values (either height or velocity).
     Returns = pandas.DataFrame: The modified DataFrame with adjusted amplitude and phase shift values.
     """
-    # Adjust negative amplitudes
-    df[phase_col] = np.where(df[amp_col] < 0, df[phase_col] + 180, df[phase_col])
-    df[amp_col] = np.abs(df[amp_col])
-    # Adjust phase shifts to be within [0, 360)
-    df[phase_col] = df[phase_col] % 360
+    amp = df[amp_col].to_numpy()
+    phase = df[phase_col].to_numpy()
+    # Adjust negative amplitudes and keep phase shifts within [0, 360), working on the arrays and writing each column back once
+    df[phase_col] = np.where(amp < 0, phase + 180, phase) % 360
+    df[amp_col] = np.abs(amp)
+    return df
+
+# Function to prepare load_two() for the precession speed section, cached as it only depends on the data
+@st.cache_data
+def prep_two():
+    """
+    Adjusts the amplitude and phase shift values for both height and velocity and calculates Omega_Warp, the precession 
+    speed of the warp, using Omega_Warp = 230/R - A_velocity/A_height.
+    Returns = pandas.DataFrame: A copy of load_two() with adjusted amplitude and phase shift values and the 'Omega_Warp' column.
+    """
+    df = adjust_amplitude_phase(load_two().copy(), 'A_height', 'C_height')
+    df = adjust_amplitude_phase(df, 'A_velocity', 'C_velocity')
+    # Using .values avoids aligning the Series on their index for the division
+    df['Omega_Warp'] = 230.0 / df['R'].values - df['A_velocity'].values / df['A_height'].values
     return df
 
+# Function to sort prep_two() by radius for the phase difference and animation tabs, cached so a radius can be selected without a scan
+@st.cache_resource
+def phase_params():
+    """
+    Sorts prep_two() by radius, time and phi and indexes it by radius, so the rows for a radius can be selected
+    directly and are already in time and phi order. The DataFrame is shared between reruns so must not be modified.
+    Returns = pandas.DataFrame: prep_two() sorted by 'R', 't' and 'phi' and indexed by 'R'.
+    """
+    return prep_two().sort_values(['R', 't', 'phi']).set_index('R', drop=False)
+
+# Function to pivot a year of the full dataset for the heatmap, cached as there are only a few hundred possible pivots
+@st.cache_data
+def heatmap_matrix(year, column):
+    """
+    Pivots the rows of the full dataset for a year into a grid of radius against phi for the heatmap.
+    Parameters:
+    year = float: The year (t) to pivot.
+    column = str: The name of the column to use for the values (either 'Zmean' or 'vZ_mean').
+    Returns = pandas.DataFrame: The pivoted data with R as the index and phi as the columns.
+    """
+    return group_full('t')[year].pivot(index='R', columns='phi', values=column)
+
+# Function to convert a year of the full dataset into Cartesian coordinates, cached as it only depends on the year
+@st.cache_data
+def polar_to_xy(year):
+    """
+    Converts the radius (R) and angle (phi) of the rows for a year in the full dataset into Cartesian coordinates
+    for the circular heatmap. The coordinates are in the same order as the rows of group_full('t')[year].
+    Parameters:
+    year = float: The year (t) to convert.
+    Returns = tuple: Two ndarrays containing the x and y coordinates (kpc).
+    """
+    df = group_full('t')[year]
+    # A single complex exponential gives both the cos and sin of phi in one pass over the array
+    z = df['R'].to_numpy() * np.exp(1j * np.deg2rad(df['phi'].to_numpy()))
+    return z.real, z.imag
+
+# Function to index prep_two() by year and radius, cached so a year and radius can be looked up without a full scan
+@st.cache_resource
+def params_by_t_R():
+    """
+    Sorts prep_two() by year, radius and phi and indexes it by year and radius, so the rows for a year and 
+    radius can be looked up directly and are in phi order. The DataFrame is shared between reruns so must not be modified.
+    Returns = pandas.DataFrame: prep_two() with a ('t', 'R') MultiIndex.
+    """
+    return prep_two().sort_values(['t', 'R', 'phi']).set_index(['t', 'R'])
+
+# Function to convert the phi values for a year and radius into radians, cached so moving the manual fit sliders doesn't redo it
+@st.cache_data
+def phi_radians(year, radius):
+    """
+    Converts the phi values for a year and radius from degrees into radians, in the same order as the rows of params_by_t_R.
+    Parameters:
+    year = float: The year (t) selected.
+    radius = float: The radius (R) selected.
+    Returns = ndarray: The phi values in radians.
+    """
+    return np.deg2rad(params_by_t_R().loc[(year, radius), 'phi'].to_numpy())
+
+# Function to evaluate the automatic sine fit for a year and radius, cached as it only depends on the selections
+@st.cache_data
+def auto_fit(year, radius, metric):
+    """
+    Evaluates the sine function with the optimum parameters for a year, radius and metric at each phi value, in the 
+    same order as the rows of params_by_t_R.
+    Parameters:
+    year = float: The year (t) selected.
+    radius = float: The radius (R) selected.
+    metric = str: Either 'height' or 'velocity'.
+    Returns = ndarray: The fitted values for each phi.
+    """
+    rows = params_by_t_R().loc[(year, radius)]
+    return sine_function(rows['phi'].to_numpy(), rows[f'A_{metric}'].iat[0], rows[f'C_{metric}'].iat[0], rows[f'D_{metric}'].iat[0])
+
+# Function to reshape the adjusted phase shifts into a table of time against radius, cached as it only depends on the metric
+@st.cache_data
+def phase_shift_pivot(metric):
+    """
+    Reshapes the adjusted phase shifts for height or velocity into a table with a row for each time and a column for 
+    each radius. The phase shift is the same for every phi at a given time and radius, so one row of each is used.
+    Parameters:
+    metric = str: Either 'height' or 'velocity'.
+    Returns = pandas.DataFrame: The phase shifts with 't' as the index and 'R' as the columns.
+    """
+    return prep_two().drop_duplicates(['t', 'R']).pivot(index='t', columns='R', values=f'C_{metric}')
+
+# Function to sample colours from a colormap, cached as the same number of radii are usually plotted on every rerun
+@lru_cache(maxsize=32)
+def colormap_colors(name, k):
+    """
+    Samples evenly spaced colours from the middle of a matplotlib colormap.
+    Parameters:
+    name = str: The name of the matplotlib colormap (e.g. 'cool').
+    k = int: The number of colours to sample.
+    Returns = ndarray: An array of k RGBA colours.
+    """
+    return plt.get_cmap(name)(np.linspace(0.3, 0.7, k))
+
+# Function to reuse a figure between reruns, so the figure is only created once per session rather than on every rerun
+def session_figure(key, figsize=None):
+    """
+    Gets the figure stored in the session state under the given key, creating it the first time, and clears it 
+    so it can be redrawn. The whole figure is cleared rather than just the axes so colorbars and twin axes from the 
+    previous rerun are removed too. The figure isn't created through pyplot so it doesn't need to be closed.
+    Parameters:
+    key = str: The session state key for the figure, each plot should use its own key.
+    figsize = tuple, optional: The width and height of the figure in inches (default is matplotlib's default size).
+    Returns = tuple: The cleared figure and a new set of axes on it.
+    """
+    if key not in st.session_state:
+        st.session_state[key] = Figure(figsize=figsize)
+    fig = st.session_state[key]
+    fig.clear()
+    return fig, fig.add_subplot()
+
 # Function to plot graph for model across all years (phase shift and amplitude)
-def plot_graph(df, title, ycol1, ycol2, ylabel1, ylabel2, phase_shift=False):
+def plot_graph(df, title, ycol1, ycol2, ylabel1, ylabel2, phase_shift=False, key='fig_model'):
     """
     Plots a graph with height and velocity data for selected radii.
     This function generates a plot with two y-axes, where one axis represents height (Kpc) and the 
@@ -68,48 +262,49 @@ def plot_graph(df, title, ycol1, ycol2, ylabel1, ylabel2, phase_shift=False):
     radii. The function includes options for displaying the phase shift as well which allows the user to 
     choose between amplitude or phase shift to plot.
     Parameters:
-    df = pandas.DataFrame: The DataFrame containing the data to be plotted. The DataFrame should include columns
-         for radius ('R'), time ('t'), and the height and velocity values.
+    df = pandas.DataFrame: The DataFrame containing the data to be plotted, indexed and sorted by radius ('R') like 
+         phase_params(). The DataFrame should include columns for time ('t') and the height and velocity values.
     title = str: The title of the plot.
     ycol1 = str: The name of the column in the DataFrame that contains the height data.
     ycol2 = str: The name of the column in the DataFrame that contains the velocity data.
     ylabel1 = str: The label for the y-axis corresponding to the height data.
     ylabel2 = str: The label for the y-axis corresponding to the velocity data.
     phase_shift = bool, optional: Whether to include phase shift in the plot (default is False).
+    key = str, optional: The session state key of the figure to draw on (default is 'fig_model').
     Returns = matplotlib.figure.Figure: The figure object containing the plot.
     """
-    fig, ax1 = plt.subplots(figsize=(16, 8))
+    fig, ax1 = session_figure(key, figsize=(16, 8))
     ax2 = None  # Initialize ax2 as None, will be used later if needed
-    
+
     # Define color gradients for the different radii
-    height_colors = plt.cm.cool(np.linspace(0.3, 0.7, len(selected_radii)))
-    velocity_colors = plt.cm.gist_heat(np.linspace(0.3, 0.7, len(selected_radii)))
+    height_colors = colormap_colors('cool', len(selected_radii))
+    velocity_colors = colormap_colors('gist_heat', len(selected_radii))
     
     # Loop through each selected radius to plot height and velocity
     for idx, radius in enumerate(selected_radii):
         if show_height:  # Check if height data should be plotted
-            # Filter the DataFrame for the current radius
-            df_selected_r_h = df[df['R'] == radius]
+            # Get the rows for the current radius by slicing the sorted radius index, a binary search rather than a scan
+            df_selected_r_h = df.loc[radius:radius]
 
-            # Split the data into two parts if necessary to prevent connecting start and end points
+            # Insert a NaN at the midpoint to prevent connecting start and end points, matplotlib breaks the line at NaN
             midpoint = len(df_selected_r_h) // 2
-            ax1.plot(df_selected_r_h['t'][:midpoint], df_selected_r_h[ycol1][:midpoint], 
-                     label=f'Height R={radius}', linestyle='-', marker='o', color=height_colors[idx])
-            ax1.plot(df_selected_r_h['t'][midpoint:], df_selected_r_h[ycol1][midpoint:], 
-                     label=f'Height R={radius}', linestyle='-', marker='o', color=height_colors[idx])
+            t = np.insert(df_selected_r_h['t'].to_numpy(), midpoint, np.nan)
+            y = np.insert(df_selected_r_h[ycol1].to_numpy(), midpoint, np.nan)
+            ax1.plot(t, y, label=f'Height R={radius}', linestyle='-', marker='o', markersize=3, 
+                     markevery=max(1, len(t) // MAX_MARKERS), color=height_colors[idx], rasterized=True)
         
         if show_velocity:  # Check if velocity data should be plotted
             if ax2 is None:
                 ax2 = ax1.twinx()  # Create a secondary y-axis for velocity data if not already created
-            # Filter the DataFrame for the current radius
-            df_selected_r_v = df[df['R'] == radius]
+            # Get the rows for the current radius by slicing the sorted radius index, a binary search rather than a scan
+            df_selected_r_v = df.loc[radius:radius]
 
-            # Split the data into two parts if necessary to prevent connecting start and end points
+            # Insert a NaN at the midpoint to prevent connecting start and end points, matplotlib breaks the line at NaN
             midpoint = len(df_selected_r_v) // 2
-            ax2.plot(df_selected_r_v['t'][:midpoint], df_selected_r_v[ycol2][:midpoint], 
-                     label=f'Velocity R={radius}', linestyle='--', marker='x', color=velocity_colors[idx])
-            ax2.plot(df_selected_r_v['t'][midpoint:], df_selected_r_v[ycol2][midpoint:], 
-                     label=f'Velocity R={radius}', linestyle='--', marker='x', color=velocity_colors[idx])
+            t = np.insert(df_selected_r_v['t'].to_numpy(), midpoint, np.nan)
+            y = np.insert(df_selected_r_v[ycol2].to_numpy(), midpoint, np.nan)
+            ax2.plot(t, y, label=f'Velocity R={radius}', linestyle='--', marker='x', markersize=3, 
+                     markevery=max(1, len(t) // MAX_MARKERS), color=velocity_colors[idx], rasterized=True)
     
     # Set labels and formatting for the primary y-axis (height)
     ax1.set_ylabel(ylabel1, color='blue', fontsize=14)
@@ -123,7 +318,7 @@ def plot_graph(df, title, ycol1, ycol2, ylabel1, ylabel2, phase_shift=False):
         ax2.tick_params(axis='y', labelcolor='red', labelsize=12)
     
     # Set the title of the plot
-    plt.title(title, fontsize=16)
+    ax1.set_title(title, fontsize=16)
     
     # Handle the legends for both axes
     ax1.legend(loc='upper left', bbox_to_anchor=(1.05, 1), bbox_transform=ax1.transAxes)
@@ -131,9 +326,9 @@ def plot_graph(df, title, ycol1, ycol2, ylabel1, ylabel2, phase_shift=False):
         ax2.legend(loc='upper left', bbox_to_anchor=(1.05, 0.9), bbox_transform=ax1.transAxes)
     
     # Adjust layout to fit everything within the figure area
-    plt.tight_layout(rect=[0, 0, 0.75, 1])
+    fig.tight_layout(rect=[0, 0, 0.75, 1])
     
-    # Display the plot in the Streamlit app
+    # Display the plot in the Streamlit app (the figure object can still be saved afterwards)
     st.pyplot(fig)
     
     # Return the figure object
@@ -153,48 +348,40 @@ def adjust_phase_shifts(df, phase_col, start_point):
     relative to this point and wrapped around within a 360-degree interval.
     Returns = pandas.DataFrame: The modified DataFrame with adjusted phase shift values.
     """
-    # Adjust the phase values based on the start_point and wrap around 360 degrees
-    df[phase_col] = (df[phase_col] - start_point) % 360 + start_point
+    # Adjust the phase values based on the start_point and wrap around 360 degrees, working in place on one copy of the
+    # array so there is no index alignment or temporary arrays for each step
+    phase = df[phase_col].to_numpy(copy=True)
+    np.subtract(phase, start_point, out=phase)
+    np.mod(phase, 360, out=phase)
+    np.add(phase, start_point, out=phase)
+    df[phase_col] = phase
     return df  # Return the modified DataFrame
            
 #function to calculate phase difference between height and velocity
 def calculate_phase_difference(combined_params_df, selected_R):
     """
     Calculates the phase difference between height and velocity for a given value of R for all years.
-    This function filters the combined parameters DataFrame based on the selected value of R, 
-    sorts the data by time 't', and computes the phase difference between the 'C_height' 
+    This function selects the rows of the combined parameters DataFrame for the selected value of R, 
+    which are already sorted by time 't', and computes the phase difference between the 'C_height' 
     and 'C_velocity' columns. The phase difference is adjusted to ensure it falls within 
     the range of -180 to 180 degrees.
     Parameters:
     combined_params_df = pd.DataFrame: DataFrame containing the combined parameters with columns
-    'R', 't', 'C_height', and 'C_velocity'.
+    'R', 't', 'C_height', and 'C_velocity', indexed by 'R' and sorted by 'R' and 't' (see phase_params).
     selected_R = float: The value of R to filter the DataFrame by.
     Returns = pd.DataFrame: A DataFrame with the filtered and sorted data, including the calculated
     'Phase_Difference' column.
     """
-   # Adjust phase difference to ensure it is within the range of -180 to 180 degrees
-    def adjust_phase_differencehv(diff):
-        """
-        Adjusts the phase difference to be within the range of -180 to 180 degrees. THis is mainly linked to the below function.
-        Parameters:
-        diff = float: The original raw phase difference value.
-        Returns = float: The adjusted phase difference value.
-        """
-        if diff > 180:
-            return diff - 360
-        elif diff < -180:
-            return diff + 360
-        else:
-            return diff
-    # Filter combined parameters DataFrame by selected R value
-    filtered_params = combined_params_df[combined_params_df['R'] == selected_R].copy()
-    # Ensure the DataFrame is sorted by time 't'
-    filtered_params = filtered_params.sort_values(by='t')
+    # Select the rows for the selected R value, these are a contiguous block already sorted by time 't'
+    filtered_params = combined_params_df.loc[[selected_R]]
     # Calculate the phase difference between 'C_height' and 'C_velocity'
-    filtered_params['Phase_Difference'] = filtered_params['C_height'] - filtered_params['C_velocity']
-
-    # Apply the adjustment function to the 'Phase_Difference' column
-    filtered_params['Phase_Difference'] = filtered_params['Phase_Difference'].apply(adjust_phase_differencehv)
+    diff = filtered_params['C_height'].values - filtered_params['C_velocity'].values
+    # Wrap the phase difference into the range of -180 to 180 degrees without branching, np.remainder keeps negative
+    # values correct and working in place on diff avoids temporary arrays
+    diff += 180.0
+    np.remainder(diff, 360.0, out=diff)
+    diff -= 180.0
+    filtered_params['Phase_Difference'] = diff
     return filtered_params
     
 # Function to plot phase difference
@@ -209,23 +396,203 @@ def plot_phase_difference(merged_df, selected_R_pha):
     merged_df = pd.DataFrame: DataFrame containing the columns 't' (time) and 'Phase_Difference'.
     selected_R_pha = float: The value of R used to generate the plot title. This is selected by the user.
     """
-    # Create a new figure with specified size
-    plt.figure(figsize=(10, 5))
-    # Plot 'Phase_Difference' against time 't'
-    plt.plot(merged_df['t'], merged_df['Phase_Difference'], marker='o', linestyle='-', color='b')
+    # Get the figure with specified size, reused between reruns
+    fig, ax = session_figure('fig_phase_difference', figsize=(10, 5))
+    # Plot 'Phase_Difference' against time 't', marking at most MAX_MARKERS points
+    ax.plot(merged_df['t'], merged_df['Phase_Difference'], marker='o', markersize=3, markevery=max(1, len(merged_df) // MAX_MARKERS), 
+            linestyle='-', color='b', rasterized=True)
     
     # Set labels for the x and y axes
-    plt.xlabel('Time (Gyr)')
-    plt.ylabel('Phase Difference (degrees)')
+    ax.set_xlabel('Time (Gyr)')
+    ax.set_ylabel('Phase Difference (degrees)')
     # Set the title of the plot
-    plt.title(f'Phase Difference Between Height and Velocity Over Time (Radius: {selected_R_pha})')
+    ax.set_title(f'Phase Difference Between Height and Velocity Over Time (Radius: {selected_R_pha})')
     # Set the x-axis limit to start from 0
-    plt.xlim(left=0)
+    ax.set_xlim(left=0)
     # Add grid lines for better readability
-    plt.grid(True)
+    ax.grid(True)
     
     # Display the plot using Streamlit
-    st.pyplot(plt)
+    st.pyplot(fig)
+
+# Function to calculate differences for consecutive R values, cached as it only depends on the selections
+@st.cache_data(max_entries=32)
+def calculate_differences(selected_r_values, metric):
+    """
+    This function computes the difference of a specified metric (e.g., 'height' or 'velocity')
+    between consecutive values of R. It uses the cached table of phase shifts with a row for each 
+    time and a column for each R value, so the differences for every pair of consecutive R values are 
+    found in one subtraction of the selected columns shifted by one.
+    Parameters:
+    selected_r_values = list of floats: List of R values for which differences are to be calculated range between 5.5 and 15.5 and must be consecutive.
+    metric = str: The metric to calculate differences for, e.g., 'height' or 'velocity'.
+    Returns = pd.DataFrame: A DataFrame containing time and the calculated differences for each pair of 
+    consecutive R values.
+    """
+    pivot = phase_shift_pivot(metric)
+    #the selected columns in the order they were given, each column minus the next one gives every difference at once
+    values = pivot.loc[:, list(selected_r_values)].to_numpy()
+    column_names = [f'{metric}_diff_{r1}_{r2}' for r1, r2 in zip(selected_r_values, selected_r_values[1:])]
+    #the time index becomes the 't' column to be able to plot against time
+    return pd.DataFrame(values[:, :-1] - values[:, 1:], index=pivot.index, columns=column_names).reset_index()
+
+# Function to adjust phase differences to fit within a specified interval, cached so repeated saves reuse the result
+@st.cache_data(max_entries=32)
+def adjust_phase_interval(diff_df, start_interval, end_interval):
+    """
+    Adjusts phase difference values to fall within a specified interval range.
+    This function modifies the phase difference values between consecutive radii in a DataFrame to ensure that they
+    fall within a given interval range by wrapping values around if necessary. Values below start_interval are
+    raised by the fewest whole turns of 360 degrees to reach it and values above end_interval are lowered by the 
+    fewest turns to fall below it, in vectorised steps on all the difference columns at once as a single array, so 
+    intervals wider than 360 degrees keep values that are already inside them. Values that still fall outside the interval are set to NaN and 
+    rows containing such values are removed from the DataFrame.
+    Parameters:
+    diff_df = pd.DataFrame: DataFrame containing phase difference columns. Only columns with
+    'diff' in their name are adjusted.
+    start_interval = float: The lower bound of the desired interval (in degrees).
+    end_interval = float: The upper bound of the desired interval (in degrees).
+    Returns = pd.DataFrame: A copy of the DataFrame with phase differences wrapped within the specified
+    interval, and rows with out-of-bounds values removed. diff_df itself is left unchanged.
+    """
+    diff_columns = [col for col in diff_df.columns if 'diff' in col]  # Only apply to difference columns
+    values = diff_df[diff_columns].to_numpy(dtype=np.float64, copy=True)
+    below = values < start_interval
+    values[below] = (values[below] - start_interval) % 360 + start_interval
+    above = values > end_interval
+    values[above] -= 360 * np.ceil((values[above] - end_interval) / 360)
+    values[values < start_interval] = np.nan
+    # Write the values into a copy, the result is cached so the caller's DataFrame mustn't be changed on a cache miss only
+    adjusted_df = diff_df.copy()
+    adjusted_df[diff_columns] = values
+    
+    return adjusted_df.dropna()  # Remove rows where phase differences are out of bounds
+
+# Function to list the saved graphs, cached by the folder's modification time so the folder is only read again when a 
+# graph is added or removed (the save buttons also clear the cache, as saving over a graph doesn't change the folder)
+@st.cache_data
+def list_graphs(folder, folder_mtime):
+    """
+    Lists the saved graphs in a folder (WebP, or PNG from older versions of the app) along with the time each was last modified.
+    Parameters:
+    folder = str: The folder containing the saved graphs.
+    folder_mtime = float: The modification time of the folder, only used so the listing is replaced when the folder changes.
+    Returns = list: A list of (file name, modification time) tuples.
+    """
+    return [(file, os.path.getmtime(os.path.join(folder, file))) for file in os.listdir(folder) if file.endswith(('.webp', '.png'))]
+
+# Function to read a saved graph, cached by modification time so an image is only read again if it is saved over
+@st.cache_data
+def load_graph(file_path, mtime):
+    """
+    Reads the bytes of a saved graph image.
+    Parameters:
+    file_path = str: The path to the image.
+    mtime = float: The modification time of the image, only used so the cached bytes are replaced when the file changes.
+    Returns = bytes: The contents of the image file.
+    """
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+# Function to build the animation of a column over phi for every year at a radius, cached as the finished figure only
+# depends on the selections
+@st.cache_resource(max_entries=16)
+def build_animation(selected_R_ani, variable):
+    """
+    Builds a Plotly figure with a frame for each year showing the selected column over phi at the selected radius along
+    with the fitted sine curve, and a slider to move between the years. The figure is shared between reruns so must 
+    not be modified.
+    Parameters:
+    selected_R_ani = float: The radius (R) selected.
+    variable = str: The column to plot, either 'Zmean' or 'vZ_mean'.
+    Returns = plotly.graph_objs.Figure: The animation figure.
+    """
+    # Determine which parameters to use based on the selected column
+    if variable == 'Zmean':
+        param_cols = {'A': 'A_height', 'C': 'C_height', 'D': 'D_height'}
+    else:
+        param_cols = {'A': 'A_velocity', 'C': 'C_velocity', 'D': 'D_velocity'}
+
+    # Look up the adjusted data for the selected R from the DataFrame indexed by radius
+    filtered_data_ani = phase_params().loc[[selected_R_ani]]
+    # Remove missing and infinite values once for all years rather than for each year, np.isfinite is False for NaN so 
+    # a single mask covers both
+    valid_data_ani = filtered_data_ani[np.isfinite(filtered_data_ani['phi'].to_numpy()) & np.isfinite(filtered_data_ani[variable].to_numpy())]
+    # Years in the animation, only years with data are added
+    years = []
+
+    # The fitted parameters are the same for every phi so the first row of each year is used, as a column per parameter
+    fit_params = valid_data_ani.drop_duplicates('t').sort_values('t')
+    A_fitted = fit_params[param_cols['A']].to_numpy(dtype=np.float64)[:, np.newaxis]
+    C_fitted = fit_params[param_cols['C']].to_numpy(dtype=np.float64)[:, np.newaxis]
+    D_fitted = fit_params[param_cols['D']].to_numpy(dtype=np.float64)[:, np.newaxis]
+    # Fitted curves for every year at once in a single call, a row for each year
+    phi_range = np.linspace(0, 360, 100)
+    fitted_curves = sine_function(phi_range, A_fitted, C_fitted, D_fitted)
+
+    # Add a frame with the data and fitted curve for each year, splitting the data by year in a single groupby rather 
+    # than a mask for each year. The figure only has the two traces and the slider swaps in each frame's data, the 
+    # traces use WebGL like the precession speed plot
+    # The arrays are passed as float32 numpy arrays rather than Series so plotly sends them as compact binary data
+    frames = []
+    phi_range_32 = phi_range.astype(np.float32)
+    for (year, clean_data), fitted_curve in zip(valid_data_ani.groupby('t', sort=True), fitted_curves.astype(np.float32)):
+        years.append(year)
+        frames.append(go.Frame(
+            data=[
+                go.Scattergl(x=clean_data['phi'].to_numpy(dtype=np.float32), y=clean_data[variable].to_numpy(dtype=np.float32), 
+                             mode='lines', name=f'Year {year}'),
+                go.Scattergl(x=phi_range_32, y=fitted_curve, mode='lines', line=dict(dash='dash', color='red'), name=f'Fitted Year {year}')
+            ],
+            layout=go.Layout(title_text=f"{variable} over phi (Year: {year})"),
+            name=str(year)
+        ))
+
+    # Initialize Plotly figure showing the first year
+    fig = go.Figure(data=frames[0].data if frames else [], frames=frames)
+
+    # Create sliders for the animation, each step jumps straight to the frame for its year
+    steps = []
+    for year in years:
+        step = dict(
+            method="animate",
+            label=str(year),
+            args=[[str(year)], {"mode": "immediate", "frame": {"duration": 0, "redraw": True}, "transition": {"duration": 0}}],
+        )
+        steps.append(step)
+
+    sliders = [dict(
+        active=0,
+        currentvalue={"prefix": "Year: "},
+        pad={"t": 50},
+        steps=steps
+    )]
+
+    # Set consistent y-axis range based on all y-values, the data and fitted curves are each reduced with numpy
+    data_values = valid_data_ani[variable].to_numpy()
+    global_min = float(min(data_values.min(), fitted_curves.min()))
+    global_max = float(max(data_values.max(), fitted_curves.max()))
+
+    #labela and axis
+    fig.update_layout(
+        sliders=sliders,
+        title=f"{variable} over phi for Radius {selected_R_ani}",
+        xaxis_title= 'phi (degrees)',
+        yaxis_title=variable,
+        yaxis=dict(range=[global_min, global_max]),  # Set the y-axis range
+        annotations=[
+            dict(
+                x=0.5,
+                y=-0.2,
+                xref='paper',
+                yref='paper',
+                text="",
+                showarrow=False
+            )
+        ]
+    )
+
+    return fig
 
 # Create eight tabs for each part of the analysis
 tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(["Documentation","Initial analysis","Heat Map", "Curve Fit","Model over time","Phase difference","Custom Graph","Animation"])
@@ -338,29 +705,33 @@ with tab1:
     # Brief description of the purpose of this section
     st.write('In this section we use a formula to rearrange the equation of our warp speed.We can assume to a good approximation that the stars are going around the disc of the galaxy (v_phi) at 230 km/s, and that this stays constant at all radii and all times. If the warp was precessing at a fixed rate at a given radius, then the relationship between the maximum vz variation and the maximum z, at a given radius and given time would be Vz_max = z_max * (v_phi/R – Omega_warp) = z_max * (230/R – Omega_warp). Where Omega_warp is the angular speed (in units km/s/kpc) at which the warp is precessing. We can rearrange this to get an expression for Omega_warp. Then for a given radius R we have the graph below of Omega_warp as a function of time.')
 
-    # Adjust amplitude and phase of sine curves (assume adjust_amplitude_phase is a predefined function)
-    two_pos_df = adjust_amplitude_phase(two_df, 'A_height', 'C_height')
-    two_pos_df = adjust_amplitude_phase(two_pos_df, 'A_velocity', 'C_velocity')
-
-    # Calculate Omega_Warp using the given formula, storing the results in a new column
-    two_pos_df['Omega_Warp'] = (230 / two_pos_df['R']) - (two_pos_df['A_velocity'] / two_pos_df['A_height'])
+    # Adjusted amplitude and phase of sine curves with Omega_Warp calculated using the given formula
+    two_pos_df = prep_two()
 
     # MultiSelectBox allows users to select multiple R values to compare Omega_Warp over time
-    selected_r_multi = st.multiselect("Select multiple R values to compare Omega_Warp over time:", two_pos_df['R'].unique())
+    selected_r_multi = st.multiselect("Select multiple R values to compare Omega_Warp over time:", R_VALUES)
 
     # Plot Omega_Warp over time for each selected R value
     if selected_r_multi:
-        plt.figure(figsize=(10, 6))
-        for r_value in selected_r_multi:
-            # Filter data for the selected R value
-            filtered_df_multi = two_pos_df[two_pos_df['R'] == r_value]
-            # Plot Omega_Warp against time
-            plt.plot(filtered_df_multi['t'], filtered_df_multi['Omega_Warp'], label=f'R = {r_value}')
-        plt.xlabel('Time (Gyr)')
-        plt.ylabel('Omega Warp (Km/s/Kpc)')
-        plt.title('Omega Warp over Time for Selected R Values')
-        plt.legend()
-        st.pyplot(plt.gcf())
+        # Only rebuild the figure when the selection has changed, otherwise reuse the one stored from the last rerun
+        if st.session_state.get('last_r_multi') != selected_r_multi:
+            # Group by radius once so each selected R value is a lookup
+            two_pos_by_R = dict(tuple(two_pos_df.groupby('R', sort=False)))
+            # Uses plotly with WebGL traces so the lines are drawn in the browser rather than rendered to an image on every rerun
+            fig = go.Figure()
+            for r_value in selected_r_multi:
+                # Get the data for the selected R value
+                filtered_df_multi = two_pos_by_R[r_value]
+                # Plot Omega_Warp against time
+                fig.add_trace(go.Scattergl(x=filtered_df_multi['t'], y=filtered_df_multi['Omega_Warp'], mode='lines', name=f'R = {r_value}'))
+            fig.update_layout(
+                title='Omega Warp over Time for Selected R Values',
+                xaxis_title='Time (Gyr)',
+                yaxis_title='Omega Warp (Km/s/Kpc)'
+            )
+            st.session_state['omega_fig'] = fig
+            st.session_state['last_r_multi'] = selected_r_multi
+        st.plotly_chart(st.session_state['omega_fig'], width='stretch')
 
     # Explanation of what the Omega_Warp value represents and its significance
     st.write('The value of Omega_warp you find here is the one we would measure if we could only see the positions and velocities of stars at a single moment in time (which is basically the situation we have in the real galaxy). The simulation also allow us to measure an actual precession speed because we can see how the phase of the warp varies with time. The difference between the two is interesting as we try to explain what we see in the Milky Way. As a sense of scale 1 km/s/kpc corresponds to about 1 radian per billion years, i.e., approximately 60 degrees per billion years.')
@@ -372,11 +743,11 @@ with tab2:
     # Create columns
     col1, col2, col3 = st.columns(3)
     # Select phi value
-    phi_values = (full_df['phi'].unique())
+    phi_values = full_uniques['phi']
     # Select column to plot on y-axis
     column_options = ['Zmean', 'vZ_mean']
     # Select multiple r values
-    r_values = full_df['R'].unique()
+    r_values = full_uniques['R']
     #creates the user select options in 3 columns
     with col1:
         selected_phi = st.selectbox('Select phi', phi_values)
@@ -386,11 +757,11 @@ with tab2:
         selected_r_values = st.multiselect('Select radius values to plot', r_values)
 
     if selected_phi is not None and selected_column and selected_r_values:
-        # Filter the full_df dataframe based on selections
-        filtered_df = full_df[(full_df['phi'] == selected_phi) & (full_df['R'].isin(selected_r_values))]
+        # Look up the rows for the selected phi
+        filtered_df = full_by_phi[selected_phi]
 
     # Plotting
-        fig, ax = plt.subplots()
+        fig, ax = session_figure('fig_tab2_phi')
         for r_value in selected_r_values:
             subset = filtered_df[filtered_df['R'] == r_value]
             ax.plot(subset['t'], subset[selected_column], label=f'radius = {r_value}')
@@ -412,7 +783,7 @@ with tab2:
     # user input options and create columns
     column1, column2, column3 = st.columns(3)
     # finding all the specific year values 
-    year_value = (full_df['t'].unique())
+    year_value = full_uniques['t']
     with column1:
         selected_year = st.selectbox('select year', year_value)
     with column2:
@@ -421,11 +792,11 @@ with tab2:
         selected_r_values_t = st.multiselect('Select radius values to plot at a year', r_values)
 
     if selected_year is not None and selected_column_t and selected_r_values_t:
-        # Filter the full_df dataframe based on selections
-        filtered_df_t = full_df[(full_df['t'] == selected_year) & (full_df['R'].isin(selected_r_values_t))]
+        # Look up the rows for the selected year
+        filtered_df_t = full_by_t[selected_year]
 
     # Plotting
-        fig_two, ax = plt.subplots()
+        fig_two, ax = session_figure('fig_tab2_year')
         for r_value_t in selected_r_values_t:
             subset_t = filtered_df_t[filtered_df_t['R'] == r_value_t]
             ax.plot(subset_t['phi'], subset_t[selected_column_t], label=f'radius = {r_value_t}')
@@ -447,55 +818,78 @@ with tab3:
     st.write('This heatmap visualizes the distribution of the selected column (Zmean or vZ_mean) across different phi positions and radius values (R) for a specific year. You can select a year and a column to analyze, and the heatmap will display the variation in values across the 2D plane defined by phi and R.')
     #user options and columns
     colu1,colu2 = st.columns(2)
-    year_value_h = (full_df['t'].unique())
+    year_value_h = full_uniques['t']
     column_options_h = ['Zmean', 'vZ_mean']
     with colu1:
         selected_year_h = st.selectbox('select year for heatmap', year_value_h)
     with colu2:
         selected_column_h = st.selectbox('Select column to plot for heatmap', column_options_h)
-    filtered_df_t_h = full_df[(full_df['t'] == selected_year_h)]
+    # Look up the rows for the selected year
+    filtered_df_t_h = full_by_t[selected_year_h]
 
     # Prepare data for heatmap
-    heatmap_data = filtered_df_t_h.pivot(index='R', columns='phi', values=selected_column_h)
-    #uses seaborn to create visualisation with set colour scheme
-    fig, ax = plt.subplots(figsize=(10, 8))
-    sns.heatmap(heatmap_data, cmap='coolwarm', norm=Normalize(vmin=-np.max(np.abs(heatmap_data)), vmax=np.max(np.abs(heatmap_data))), ax=ax)
+    heatmap_data = heatmap_matrix(selected_year_h, selected_column_h)
+    # Colour scale is centred on zero, the bound comes from the min and max so no array of absolute values is needed
+    heatmap_values = heatmap_data.to_numpy()
+    abs_max = max(np.nanmax(heatmap_values), -np.nanmin(heatmap_values))
+    #uses plotly so the heatmap is drawn in the browser rather than rendered to an image on every rerun
+    fig = go.Figure(go.Heatmap(z=heatmap_values, x=heatmap_data.columns, y=heatmap_data.index, colorscale='RdBu_r', 
+                               zmin=-abs_max, zmax=abs_max, colorbar=dict(title=selected_column_h)))
     
-    #plotting the labels
-    ax.set_xlabel(r'$\phi$ (degrees)')
-    ax.set_ylabel('Radius (kpc)')
-    ax.set_title(f'{selected_column_h} Heatmap at Time = {selected_year_h:.2f}')
+    #plotting the labels, with radius increasing downwards as in the previous seaborn heatmap
+    fig.update_layout(
+        title=f'{selected_column_h} Heatmap at Time = {selected_year_h:.2f}',
+        xaxis_title='phi (degrees)',
+        yaxis_title='Radius (kpc)',
+        yaxis=dict(autorange='reversed')
+    )
     # Show the heatmap in Streamlit
-    st.pyplot(fig)
+    st.plotly_chart(fig, width='stretch')
 
     st.subheader(f"{star_emoji}Heat Map Circular{star_emoji}")
     st.write('This circular distribution plot shows the spatial distribution of the selected column (Zmean or vZ_mean) across a 2D plane for a specific year. The plot translates phi and radius values (R) into Cartesian coordinates (X and Y), allowing you to visualize how the values are distributed in space.')
 
    # Plot Circular Distribution using Scatter with Adjusted Size
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig, ax = session_figure('fig_tab3', figsize=(10, 8))
     
     # Convert polar to Cartesian coordinates
-    filtered_df_t_h['x'] = filtered_df_t_h['R'] * np.cos(np.radians(filtered_df_t_h['phi']))
-    filtered_df_t_h['y'] = filtered_df_t_h['R'] * np.sin(np.radians(filtered_df_t_h['phi']))
+    x, y = polar_to_xy(selected_year_h)
     
     # Calculate circle sizes based on the distance from the center
     # This ensures that circles will be larger in the outer regions and smaller in the inner regions
-    max_radius = filtered_df_t_h['R'].max()
-    
     # Adjust circle size to fill the gaps and touch each other
     # The size of the circles should be proportional to the radial distance
-    circle_sizes = (filtered_df_t_h['R'] / max_radius) ** 0.5 * 1000  # Adjust 1000 for better fitting
+    # R is stored as float32 so the sizes are computed in float32 with np.sqrt rather than the generic power
+    circle_sizes = np.sqrt(filtered_df_t_h['R'].to_numpy(dtype=np.float32) / np.float32(R_MAX)) * np.float32(1000)  # Adjust 1000 for better fitting
     
-    # Scatter plot with circles that fill the space and touch
-    sc = ax.scatter(
-        filtered_df_t_h['x'], 
-        filtered_df_t_h['y'], 
-        c=filtered_df_t_h[selected_column_h], 
-        cmap='coolwarm', 
-        norm=plt.Normalize(vmin=-np.max(np.abs(filtered_df_t_h[selected_column_h])), vmax=np.max(np.abs(filtered_df_t_h[selected_column_h]))), 
-        s=circle_sizes,  # Size of circles adjusted for touching
-        alpha=1  # Full opacity to avoid gaps
-    )
+    # Colour scale is centred on zero, with the bound computed once rather than for each of vmin and vmax
+    colour_values = filtered_df_t_h[selected_column_h].to_numpy()
+    abs_max = float(max(np.nanmax(colour_values), -np.nanmin(colour_values)))
+
+    if len(colour_values) > SCATTER_MAX_POINTS:
+        # For dense data average the values into a fixed grid of hexagons, so the drawing cost doesn't grow with the points
+        sc = ax.hexbin(
+            x, 
+            y, 
+            C=colour_values, 
+            reduce_C_function=np.mean, 
+            gridsize=60, 
+            cmap='coolwarm', 
+            norm=plt.Normalize(vmin=-abs_max, vmax=abs_max), 
+            rasterized=True
+        )
+    else:
+        # Scatter plot with circles that fill the space and touch
+        sc = ax.scatter(
+            x, 
+            y, 
+            c=colour_values, 
+            cmap='coolwarm', 
+            norm=plt.Normalize(vmin=-abs_max, vmax=abs_max), 
+            s=circle_sizes,  # Size of circles adjusted for touching
+            alpha=1,  # Full opacity to avoid gaps
+            rasterized=True  # Draw the circles as a single bitmap while the axes, labels and colorbar stay vector
+        )
     
     # Set axis labels and title
     ax.set_xlabel('X (kpc)')
@@ -504,7 +898,7 @@ with tab3:
     ax.set_aspect('equal', 'box')
     
     # Add colorbar
-    plt.colorbar(sc, ax=ax, label=selected_column_h)
+    fig.colorbar(sc, ax=ax, label=selected_column_h)
     
     # Show the plot in Streamlit
     st.pyplot(fig)
@@ -516,7 +910,7 @@ with tab4:
     st.write('This section provides a curve fit analysis for the selected column (height or velocity) at a specific year and radius value (R). You can choose a year, column, and radius value to analyse, and then compare the data against either a manual or automatic sine wave fit. Use the checkboxes to toggle between the manual fit, where you can adjust the amplitude, phase shift, and vertical shift, and the automatic fit, which uses optimised parameters to fit the data. The graph will display the selected data alongside the chosen fitting curve, allowing you to explore how well the model represents the underlying data.')
     # User input options
     colum1, colum2, colum3 = st.columns(3)
-    year_value = two_df['t'].unique()
+    year_value = T_VALUES
     time_min = year_value.min()
     time_max = year_value.max()
     with colum1:
@@ -524,23 +918,27 @@ with tab4:
     with colum2:
         selected_column_t_c = st.selectbox('Select column to plot for fit', ['height Kpc', 'velocity Km/s'])
     with colum3:
-        selected_r_values_t_c = st.selectbox('Select radius value to plot for fit', two_df['R'].unique())
+        selected_r_values_t_c = st.selectbox('Select radius value to plot for fit', R_VALUES)
 
     if selected_year_c is not None and selected_column_t_c and selected_r_values_t_c:
-        # Filter the two_df dataframe based on selections
-        filtered_df_t_c = two_df[(two_df['t'] == selected_year_c) & (two_df['R'] == selected_r_values_t_c)]
+        # Look up the adjusted data for the selections, a missing year and radius pair gives an empty frame rather than an error
+        try:
+            filtered_df_t_c = params_by_t_R().loc[(selected_year_c, selected_r_values_t_c)]
+        except KeyError:
+            filtered_df_t_c = params_by_t_R().iloc[:0]
        
         #this defined the a,c and d optimum parameters based on whether the user selects height of velocity
+        #they are the same for every phi so the first value is read directly as a scalar
         if not filtered_df_t_c.empty:
             if selected_column_t_c == 'height Kpc':
-                A_opt = filtered_df_t_c['A_height'].values[0]
-                C_opt = filtered_df_t_c['C_height'].values[0]
-                D_opt = filtered_df_t_c['D_height'].values[0]
+                A_opt = filtered_df_t_c['A_height'].iat[0]
+                C_opt = filtered_df_t_c['C_height'].iat[0]
+                D_opt = filtered_df_t_c['D_height'].iat[0]
                 y_data = filtered_df_t_c['Zmean']
             elif selected_column_t_c == 'velocity Km/s':
-                A_opt = filtered_df_t_c['A_velocity'].values[0]
-                C_opt = filtered_df_t_c['C_velocity'].values[0]
-                D_opt = filtered_df_t_c['D_velocity'].values[0]
+                A_opt = filtered_df_t_c['A_velocity'].iat[0]
+                C_opt = filtered_df_t_c['C_velocity'].iat[0]
+                D_opt = filtered_df_t_c['D_velocity'].iat[0]
                 y_data = filtered_df_t_c['vZ_mean']
 
             x_data = filtered_df_t_c['phi']#this stays the same regardless of user option
@@ -554,12 +952,13 @@ with tab4:
                 amplitude = st.slider("Amplitude (A)", min_value=0.0, max_value=10.0, value=5.0, step=0.0001)
                 phase_shift = st.slider("Phase Shift (C)", min_value=-180.0, max_value=180.0, value=0.0)
                 vertical_shift = st.slider("Vertical Shift (D)", min_value=0.0, max_value=10.0, value=5.0, step=0.0001)
-                # Create a sine wave based on user inputs
-                y_manual = amplitude * np.sin(np.radians(x_data + phase_shift)) + vertical_shift
+                # Create a sine wave based on user inputs, phi is already in radians so only the phase shift is converted
+                x_rad = phi_radians(selected_year_c, selected_r_values_t_c)
+                y_manual = amplitude * np.sin(x_rad + np.deg2rad(phase_shift)) + vertical_shift
                 # Plot manual fitting with label and axis adjustment
-                fig, ax = plt.subplots()
-                ax.plot(filtered_df_t_c['phi'], y_data, label='Data', color='blue')
-                ax.plot(x_data, y_manual, label='Manual Fit', color='orange', linestyle='--')
+                fig, ax = session_figure('fig_tab4_manual')
+                ax.plot(filtered_df_t_c['phi'], y_data, label='Data', color='blue', rasterized=True)
+                ax.plot(x_data, y_manual, label='Manual Fit', color='orange', linestyle='--', rasterized=True)
                 ax.set_xlabel(r'$\phi$ (degrees)')
                 ax.set_xlim(left=0)
                 ax.set_ylabel(f"{selected_column_t_c}")
@@ -567,13 +966,13 @@ with tab4:
                 st.pyplot(fig)
 
             if show_auto_fit:
-                # Create a sine wave with the optimized parameters
-                y_auto = sine_function(x_data, A_opt, C_opt, D_opt)
+                # Create a sine wave with the optimized parameters, cached for each year, radius and column
+                y_auto = auto_fit(selected_year_c, selected_r_values_t_c, 'height' if selected_column_t_c == 'height Kpc' else 'velocity')
 
                 # Plot automatic fitting
-                fig, ax = plt.subplots()
-                ax.plot(x_data, y_data, label='Data', color='blue')
-                ax.plot(x_data, y_auto, label='Automatic Fit', color='green', linestyle='--')
+                fig, ax = session_figure('fig_tab4_auto')
+                ax.plot(x_data, y_data, label='Data', color='blue', rasterized=True)
+                ax.plot(x_data, y_auto, label='Automatic Fit', color='green', linestyle='--', rasterized=True)
                 ax.set_xlabel(r'$\phi$ (degrees)')
                 ax.set_xlim(left=0)
                 ax.set_ylabel(f"{selected_column_t_c}")
@@ -590,9 +989,9 @@ with tab4:
 
 with tab5:
     #tab 5 shows that after finding the optimised parameters we can then plot them overtime to see how amplitude (strength of warp) and phase shift (motion of warp) change overtime. With a section to adjust the degree interval for phase shift.
-    # Adjusting amplitude and phase shift values for height and velocity
-    two_pos_df = adjust_amplitude_phase(two_df.copy(), 'A_height', 'C_height')
-    two_pos_df = adjust_amplitude_phase(two_pos_df, 'A_velocity', 'C_velocity')
+    # Adjusted amplitude and phase shift values for height and velocity indexed by radius, cached and shared so they aren't 
+    # recomputed or copied on every rerun
+    two_pos_df = phase_params()
 
     st.subheader(f"{star_emoji} Model across all years {star_emoji}")
     st.write('This section allows you to analyse the amplitude (A) or phase shift (C) of height and velocity data across all years for selected radius values (R). You can choose whether to display the amplitude or phase shift model, and select which radius values and data types (height and/or velocity) to include in the plot. With the resulting graph you can compare the amplitude or phase shift variations for both height and velocity overtime.')
@@ -601,7 +1000,7 @@ with tab5:
     with opt1:     
         plot_type = st.selectbox("Choose the type of plot", ["Amplitude (A)", "Phase Shift (C)"])
     with opt2:
-        selected_radii = st.multiselect("Select R values:", options=two_df['R'].unique())
+        selected_radii = st.multiselect("Select R values:", options=R_VALUES)
     with opt3:
         show_velocity = st.checkbox("Show Velocity Data")
     with opt4:
@@ -614,7 +1013,7 @@ with tab5:
         if plot_type == "Amplitude (A)":
             st.subheader("Amplitude (A) Model across all years")
             st.write('The amplitude in the data represents the maximum deviation of particles from the galactic plane (for height) or the maximum velocity in the vertical direction (for velocity) at a given radius and time.')
-            fig = plot_graph(two_pos_df, 'Amplitude (A) over Time', 'A_height', 'A_velocity', 'Amplitude (A)', 'Amplitude (A)')
+            fig = plot_graph(two_pos_df, 'Amplitude (A) over Time', 'A_height', 'A_velocity', 'Amplitude (A)', 'Amplitude (A)', key='fig_amplitude')
             with st.expander('Amplitude height results'):
                 st.markdown(
         """
@@ -649,7 +1048,7 @@ with tab5:
         elif plot_type == "Phase Shift (C)":
             st.subheader("Original Phase Shift (C) Model across all years")
             st.write('The phase shift of the galactic warps height data indicates the timing and distribution of vertical displacements from the galactic plane. The phase shift of the galactic warp’s velocity data reflects the timing and distribution of vertical velocities within the galactic disk. The combined data represents the curvature of particles within the warp at a given radius and time.')
-            fig = plot_graph(two_pos_df, 'Phase Shift (C) over Time', 'C_height', 'C_velocity', 'Phase Shift (C)', 'Phase Shift (C)', phase_shift=True)
+            fig = plot_graph(two_pos_df, 'Phase Shift (C) over Time', 'C_height', 'C_velocity', 'Phase Shift (C)', 'Phase Shift (C)', phase_shift=True, key='fig_phase')
 
             st.subheader(f"{star_emoji}Adjust Phase Shift Interval{star_emoji}")
             st.write('After adjusting the phase shift interval, this graph shows the updated phase shift (C) for height and velocity data over time. By customising the start point of the 360-degree interval, we can fine-tune the phase shift to produce a smoother graph that better aligns with the data points. This adjustment helps in choosing the optimal interval that reveals the most consistent patterns in the phase shift model for the selected radius values.')
@@ -657,11 +1056,11 @@ with tab5:
 
             update_graph = st.checkbox('See phase shift updated Graph')
             if update_graph:
-                adjusted_height_df = adjust_phase_shifts(two_pos_df.copy(), 'C_height', start_point)
-                adjusted_velocity_df = adjust_phase_shifts(two_pos_df.copy(), 'C_velocity', start_point)
-                adjusted_combined_df = pd.concat([adjusted_height_df, adjusted_velocity_df])
+                # Adjust both phase shift columns on a single copy, rather than concatenating two separately adjusted copies
+                adjusted_df = adjust_phase_shifts(two_pos_df.copy(), 'C_height', start_point)
+                adjusted_df = adjust_phase_shifts(adjusted_df, 'C_velocity', start_point)
                 st.subheader("Adjusted Phase Shift (C) Model")
-                fig = plot_graph( adjusted_combined_df, 'Adjusted Phase Shift (C) over Time', 'C_height', 'C_velocity', 'Phase Shift (C)', 'Phase Shift (C)', phase_shift=True)
+                fig = plot_graph( adjusted_df, 'Adjusted Phase Shift (C) over Time', 'C_height', 'C_velocity', 'Phase Shift (C)', 'Phase Shift (C)', phase_shift=True, key='fig_phase_adjusted')
 
             # Store the final figure in session state
             st.session_state['fig_final'] = fig
@@ -684,10 +1083,10 @@ with tab5:
         filename = st.text_input("Enter the filename without extension:", "graph")
         if st.button('Save Phase Shift Graph'):
             if 'fig_final' in st.session_state:
-                if not os.path.exists('saved_graphs'):
-                    os.makedirs('saved_graphs')
-                file_path = os.path.join('saved_graphs', f'{filename}.png')
-                st.session_state['fig_final'].savefig(file_path)
+                os.makedirs('saved_graphs', exist_ok=True)
+                file_path = os.path.join('saved_graphs', f'{filename}.webp')
+                st.session_state['fig_final'].savefig(file_path, **GRAPH_SAVE_OPTIONS)
+                list_graphs.clear()
                 st.success(f'Graph saved as {file_path}')
             else:
                 st.error("No graph to save. Please create or update a graph first.")
@@ -695,95 +1094,18 @@ with tab6:
     #tab 6 has two plots comparing phase difference. The first plot is the differnce between height and velocity at a set radius for example the height phase shift and velocity phase shift for 5.5 Kpc and then we can compare to previous studies. The second is the difference in height phase shift/velocity phase shift between consecutive radii for example difference between height phase at 6.5 and 5.5 Kpc.
     st.subheader(f"{star_emoji} Difference in Phase shift H and V{star_emoji}")
     st.write('This analysis explores the phase shift difference between height and velocity for a selected radius (R) over time. The phase shift difference is calculated by subtracting the velocity phase shift from the height phase shift. Any differences outside the range of ±180 degrees are adjusted to maintain consistency. This visualisation helps in understanding how the phase relationships between height and velocity evolve over time for a specific radius, highlighting periods of synchronisation or divergence.')
-    selected_R_pha = st.selectbox('Select Radius (R):', two_df['R'].unique())
+    selected_R_pha = st.selectbox('Select Radius (R):', R_VALUES)
 
     # Calculate phase difference
-    merged_df = calculate_phase_difference(two_pos_df, selected_R_pha)
+    merged_df = calculate_phase_difference(phase_params(), selected_R_pha)
     # Plot phase difference
     plot_phase_difference(merged_df, selected_R_pha)
     st.write('With the above plot we are looking at points with the value of 90 degrees to be where velocity and height data are in sync. The reason for this is because the phase difference between velocity and displacement in simple harmonic motion is a quarter-cycle, or 90 degrees. Due to velocity being the derivative of displacement, and the derivative of a sine or cosine function is shifted by a quarter-cycle. Overall, from the graph all radii show at the beginning timeframe large phase shift differences as the velocity and height are still affected by the interaction with the dwarf galaxy and this disturbance causes them to be out of sync. In contrast some radii experience times where height and velocity difference is fluctuating around 90 or -90 degrees, however this time period varies for each radii without a set pattern. In addition to this, evidence in research suggests that in the Milky way we see that the peaks of height and velocity are misaligned by about 50 degrees for the warp. The simple theory is 90 degrees but the graph above shows that the warp is more complex.')
 
     st.subheader(f"{star_emoji}Phase Difference Between Radii{star_emoji}")
     st.write("This section focuses on the phase shift differences across consecutive radius values for either height or velocity. By analysing these differences, we can observe how phase shifts vary across different regions. This visualisation makes it easier to spot patterns or unusual changes in the system's behavior.")
-    # Adjusting amplitude and phase shift values for height and velocity
-    two_pos_df = adjust_amplitude_phase(two_df, 'A_height', 'C_height')
-    two_pos_df = adjust_amplitude_phase(two_pos_df, 'A_velocity', 'C_velocity')
-
-    # Get unique radii values from the DataFrame
-    r_values = sorted(two_pos_df['R'].unique())
-
-    # Calculate differences for consecutive R values
-    def calculate_differences(df, selected_r_values, metric):
-        """
-        This function computes the difference of a specified metric (e.g., 'height' or 'velocity')
-        between consecutive values of R. It assumes that the input DataFrame contains columns 
-        for R values, time, and the metric of interest. For each pair of consecutive R values, it
-        merges the data based on time and calculates the difference in the metric values.
-        Parameters:
-        df = pd.DataFrame: DataFrame containing columns 'R', 't' (time), and the metric of interest (e.g., 'C_height', 'C_velocity').
-        selected_r_values = list of floats: List of R values for which differences are to be calculated range between 5.5 and 15.5 and must be consecutive.
-        metric = str: The metric to calculate differences for, e.g., 'height' or 'velocity'.
-        Returns = pd.DataFrame: A DataFrame containing time and the calculated differences for each pair of 
-        consecutive R values.
-        """
-        differences = [] #create list
-        #as we have multiselect box, we need a for loop for each option
-        for i in range(len(selected_r_values) - 1):
-            r1 = selected_r_values[i]
-            r2 = selected_r_values[i + 1]
-            
-            df_r1 = df[df['R'] == r1]
-            df_r2 = df[df['R'] == r2]
-            
-            if df_r1.empty or df_r2.empty:
-                continue
-            
-            #creates a new column with the differnces is not already there
-            diff_column = f'{metric}_diff_{r1}_{r2}'
-            df_r1 = df_r1[['t', f'C_{metric}']].rename(columns={f'C_{metric}': 'value'})
-            df_r2 = df_r2[['t', f'C_{metric}']].rename(columns={f'C_{metric}': 'value'})
-            
-            #adds this column to the original table to be able to plot against time
-            merged = pd.merge(df_r1, df_r2, on='t', suffixes=('_r1', '_r2'))
-            merged[diff_column] = merged[f'value_r1'] - merged[f'value_r2']
-            differences.append(merged[['t', diff_column]])
-
-        return pd.concat(differences, ignore_index=True)
-
-    # Adjust phase differences to fit within a specified interval
-    def adjust_phase_interval(diff_df, start_interval, end_interval):
-        """
-        Adjusts phase difference values to fall within a specified interval range.
-        This function modifies the phase difference values between consecutive radii in a DataFrame to ensure that they
-        fall within a given interval range by wrapping values around if necessary. Values outside
-        the range are set to `None` and rows containing such values are removed from the DataFrame.
-        Parameters:
-        diff_df = pd.DataFrame: DataFrame containing phase difference columns. Only columns with
-        'diff' in their name are adjusted.
-        start_interval = float: The lower bound of the desired interval (in degrees).
-        end_interval = float: The upper bound of the desired interval (in degrees).
-        Returns = pd.DataFrame: The adjusted DataFrame with phase differences wrapped within the specified
-        interval, and rows with out-of-bounds values removed.
-        """
-        def adjust_value(value):
-            """
-           Adjusts a single phase difference value to ensure it falls within the specified interval.
-           Mainly used for the below function.
-           Parameters:
-           value (float): The phase difference value to be adjusted. This is selected by the user.
-           Returns = float or None: The adjusted value if within the interval, otherwise None.
-           """
-            while value < start_interval:
-                value += 360
-            while value > end_interval:
-                value -= 360
-            return value if start_interval <= value <= end_interval else None
-        
-        for col in diff_df.columns:
-            if 'diff' in col:  # Only apply to difference columns
-                diff_df[col] = diff_df[col].apply(adjust_value)
-        
-        return diff_df.dropna()  # Remove rows where phase differences are out of bounds
+    # Radius values to select from
+    r_values = R_VALUES
 
     # Interactive plot function
     def plot_differences(selected_r_values, selected_metric, adjusted=False):
@@ -806,21 +1128,20 @@ with tab6:
             return
         
         # Calculate differences
-        diff_df = calculate_differences(two_pos_df, selected_r_values, selected_metric)
+        diff_df = calculate_differences(selected_r_values, selected_metric)
         
         # Apply interval adjustment if required
         if adjusted:
             diff_df = adjust_phase_interval(diff_df, start_interval, end_interval)
         
-        fig, ax = plt.subplots(figsize=(14, 8))
+        fig, ax = session_figure('fig_differences_adjusted' if adjusted else 'fig_differences', figsize=(14, 8))
         
-        for i in range(len(selected_r_values) - 1):
-            r1 = selected_r_values[i]
-            r2 = selected_r_values[i + 1]
-            column_name = f'{selected_metric}_diff_{r1}_{r2}'
-            
-            if column_name in diff_df.columns:
-                ax.plot(diff_df['t'], diff_df[column_name], marker='o', label=f'{selected_metric.capitalize()} diff {r1}-{r2}')
+        # Plot all the difference columns in one call, matplotlib draws a line for each column of a 2D array
+        pairs = list(zip(selected_r_values, selected_r_values[1:]))
+        column_names = [f'{selected_metric}_diff_{r1}_{r2}' for r1, r2 in pairs]
+        ax.plot(diff_df['t'].to_numpy(), diff_df[column_names].to_numpy(), marker='o', markersize=3, 
+                markevery=max(1, len(diff_df) // MAX_MARKERS), label=[f'{selected_metric.capitalize()} diff {r1}-{r2}' for r1, r2 in pairs], 
+                rasterized=True)
         
         ax.set_xlabel('Time (Gyr)')
         ax.set_ylabel(f'{selected_metric.capitalize()} Phase Difference (degrees)')
@@ -872,25 +1193,27 @@ with tab6:
         if st.button('Save Graph'):
             if update_graph:
                 # Save the adjusted graph
-                diff_df = calculate_differences(two_pos_df, r_selector, metric_selector)
+                diff_df = calculate_differences(r_selector, metric_selector)
                 adjusted_df = adjust_phase_interval(diff_df, start_interval, end_interval)
                 
-                fig, ax = plt.subplots(figsize=(14, 8))
-                for i in range(len(r_selector) - 1):
-                    r1 = r_selector[i]
-                    r2 = r_selector[i + 1]
-                    column_name = f'{metric_selector}_diff_{r1}_{r2}'
-                    
-                    if column_name in adjusted_df.columns:
-                        ax.plot(adjusted_df['t'], adjusted_df[column_name], marker='o', label=f'{metric_selector.capitalize()} diff {r1}-{r2}')
+                # Draw on a figure reused between saves rather than creating one through pyplot each time
+                fig, ax = session_figure('fig_save_differences', figsize=(14, 8))
+                # Plot all the difference columns in one call, matplotlib draws a line for each column of a 2D array
+                pairs = list(zip(r_selector, r_selector[1:]))
+                column_names = [f'{metric_selector}_diff_{r1}_{r2}' for r1, r2 in pairs]
+                ax.plot(adjusted_df['t'].to_numpy(), adjusted_df[column_names].to_numpy(), marker='o', markersize=3, 
+                        markevery=max(1, len(adjusted_df) // MAX_MARKERS), label=[f'{metric_selector.capitalize()} diff {r1}-{r2}' for r1, r2 in pairs], 
+                        rasterized=True)
                 
                 ax.set_xlabel('Year')
                 ax.set_ylabel(f'{metric_selector.capitalize()} Difference')
                 ax.set_title(f'{metric_selector.capitalize()} Difference Over Time')
                 ax.legend()
-                file_path = os.path.join('saved_graphs', f'{filename}.png')
-                plt.savefig(file_path)
-                st.success(f"Graph saved as {filename}.png")
+                os.makedirs('saved_graphs', exist_ok=True)
+                file_path = os.path.join('saved_graphs', f'{filename}.webp')
+                fig.savefig(file_path, **GRAPH_SAVE_OPTIONS)
+                list_graphs.clear()
+                st.success(f"Graph saved as {filename}.webp")
             else:
                 st.error("No updated graph to save. Please update the graph first.")
 with tab7:
@@ -901,22 +1224,29 @@ with tab7:
     saved_graphs_folder = 'saved_graphs'
 
     # List all files in the saved_graphs folder
-    if os.path.exists(saved_graphs_folder):
-        files = os.listdir(saved_graphs_folder)
+    # A single stat of the folder, which also tells us whether it exists
+    try:
+        folder_mtime = os.stat(saved_graphs_folder).st_mtime
+    except FileNotFoundError:
+        folder_mtime = None
+    if folder_mtime is not None:
+        graphs = list_graphs(saved_graphs_folder, folder_mtime)
         
-        if files:
-            for file in files:
-                if file.endswith('.png'):
-                    file_path = os.path.join(saved_graphs_folder, file)
-                    graph_name = os.path.splitext(file)[0]
-
-                    with st.expander(f"Graph: {graph_name}"):
-                        # Display the image
-                        st.image(file_path, caption=graph_name)
-
-                        # Text area for analysis
-                        analysis = st.text_area(f"Analysis for {graph_name}", key=file)
-                        st.write(analysis)
+        if graphs:
+            for file, mtime in graphs:
+                file_path = os.path.join(saved_graphs_folder, file)
+                graph_name = os.path.splitext(file)[0]
+
+                # The expander tracks whether it is open, so images are only loaded and sent for the graphs being viewed
+                expander = st.expander(f"Graph: {graph_name}", key=f"expander_{file}", on_change='rerun')
+                with expander:
+                    if expander.open:
+                        # Display the image from the cached bytes
+                        st.image(load_graph(file_path, mtime), caption=graph_name)
+
+                    # Text area for analysis
+                    analysis = st.text_area(f"Analysis for {graph_name}", key=file)
+                    st.write(analysis)
         else:
             st.info("No graphs saved yet.")
     else:
@@ -926,107 +1256,13 @@ with tab8:
 #tab 8 creates a plot to visualise all years in detail and shows the change through a slider option. Similar to the inital second plot on tab 1 with added curve fit and option to view all years.
     st.subheader(f"{star_emoji}Animation across all Years{star_emoji}")
     st.write("This section allows you to explore how a selected variable changes over time for a specific radius. By choosing a radius and a variable such as Zmean or vZ_mean, you can view an animation showing the evolution of the data across different years. The animation displays the variable's distribution and fitted curves for each year, helping you observe trends and variations over time. Use the slider to navigate through the years and analyze how the variable's behavior shifts.")
-    # Adjusting amplitude and phase shift values for height and velocity
-    two_pos_df = adjust_amplitude_phase(two_df, 'A_height', 'C_height')
-    two_pos_df = adjust_amplitude_phase(two_df, 'A_velocity', 'C_velocity')
-
     # User options
     newcol1,newcol2 = st.columns(2)
     with newcol1:
-        selected_R_ani = st.selectbox('Select Radius R:', two_df['R'].unique())
+        selected_R_ani = st.selectbox('Select Radius R:', R_VALUES)
     with newcol2:
         variable = st.selectbox('Select column for animation:', ['Zmean', 'vZ_mean'])
 
-    # Determine which parameters to use based on user selection
-    if variable == 'Zmean':
-        param_cols = {'A': 'A_height', 'C': 'C_height', 'D': 'D_height'}
-    else:
-        param_cols = {'A': 'A_velocity', 'C': 'C_velocity', 'D': 'D_velocity'}
-
-    # Filter data based on selected R
-    filtered_data_ani = two_pos_df[two_pos_df['R'] == selected_R_ani]
-    # Get unique years for animation
-    years = filtered_data_ani['t'].unique()
-    # Initialize Plotly figure
-    fig = make_subplots(rows=1, cols=1)
-
-    # Initialize lists for y-values
-    all_y_values = []
-
-    # Add traces for each year
-    for year in filtered_data_ani['t'].unique():
-        frame_data = filtered_data_ani[filtered_data_ani['t'] == year]
-        clean_data = frame_data.dropna(subset=['phi', variable])
-        clean_data = clean_data[np.isfinite(clean_data[variable])]
-        
-        if clean_data.empty:
-            continue
-
-        all_y_values.extend(clean_data[variable].tolist())
-        
-        A_fitted = clean_data[param_cols['A']].values[0]
-        C_fitted = clean_data[param_cols['C']].values[0]
-        D_fitted = clean_data[param_cols['D']].values[0]
-
-        phi_range = np.linspace(0, 360, 100)
-        fitted_curve = sine_function(phi_range, A_fitted, C_fitted, D_fitted)
-        all_y_values.extend(fitted_curve)
-        
-        fig.add_trace(
-            go.Scatter(x=clean_data['phi'], y=clean_data[variable], mode='lines', name=f'Year {year}', visible=False)
-        )
-        
-        fig.add_trace(
-            go.Scatter(x=phi_range, y=fitted_curve, mode='lines', line=dict(dash='dash', color='red'), name=f'Fitted Year {year}', visible=False)
-        )
-
-    # Set the first trace visible
-    if len(fig.data) > 0:
-        fig.data[0].visible = True
-        if len(fig.data) > 1:
-            fig.data[1].visible = True
-
-    # Create sliders and buttons for the animation
-    steps = []
-    for i in range(0, len(fig.data), 2):
-        step = dict(
-            method="update",
-            args=[{"visible": [False] * len(fig.data)}, {"title": f"{variable} over phi (Year: {years[i//2]})"}],
-        )
-        step["args"][0]["visible"][i] = True
-        if i + 1 < len(fig.data):
-            step["args"][0]["visible"][i + 1] = True
-        steps.append(step)
-
-    sliders = [dict(
-        active=0,
-        currentvalue={"prefix": "Year: "},
-        pad={"t": 50},
-        steps=steps
-    )]
-
-    # Set consistent y-axis range based on all y-values
-    global_min = min(all_y_values)
-    global_max = max(all_y_values)
-
-    #labela and axis
-    fig.update_layout(
-        sliders=sliders,
-        title=f"{variable} over phi for Radius {selected_R_ani}",
-        xaxis_title= 'phi (degrees)',
-        yaxis_title=variable,
-        yaxis=dict(range=[global_min, global_max]),  # Set the y-axis range
-        annotations=[
-            dict(
-                x=0.5,
-                y=-0.2,
-                xref='paper',
-                yref='paper',
-                text="",
-                showarrow=False
-            )
-        ]
-    )
-
-    st.plotly_chart(fig)
+    # The figure is built once for each radius and column and then reused
+    st.plotly_chart(build_animation(selected_R_ani, variable))
     st.write('The analysis of the data for radii from 5.5 to 15.5 kpc from the galactic center reveals a progression in the behavior of ripples as the radius increases. For smaller radii (5.5 kpc), the ripples after the object passes are small in height and gradually shift from 230 to 300 degrees, with only minor changes in size. As the radius increases to 10.5 kpc and beyond, these ripples become more pronounced, growing in height and taking longer to stabilize. Particularly at 13.5 kpc, the ripples exhibit significant negative heights, peaking at -13.967 and taking longer to settle, a pattern that persists and intensifies at 14.5 and 15.5 kpc, where the maximum height reaches -16.178. These observations suggest that the warp in the galactic disk becomes more pronounced at larger radii, with increasing ripple height and longer periods before stabilization, indicating a stronger and more complex warp effect as one moves further from the center. This trend suggests that the outer regions of the galaxy experience more impact due to the interaction.')
\ No newline at end of file